@@ -58,6 +58,9 @@ class RetrievalProviderConfig:
     use_knn: Optional[bool] = None
     enabled: bool = False
     vector_type: Optional[Dict[str, Any]] = None
+    cache_enabled: bool = True  # Enable or disable caching of query results
+    cache_ttl: int = 300  # Seconds a cached query result stays valid
+    cache_max_size: int = 1024  # Maximum number of cached query results
 @dataclass
 class SSLConfig:
     enabled: bool = False
@@ -100,6 +103,7 @@ class NLWebConfig:
     required_info_enabled: bool = True  # Enable or disable required info checking
     aggregation_enabled: bool = False  # Enable or disable aggregation functionality
     who_endpoint_enabled: bool = True  # Enable or disable the who endpoint
+    summary_cache_enabled: bool = False  # Enable or disable the semantic cache for result summaries
     api_keys: Dict[str, str] = field(default_factory=dict)  # API keys for external services
     who_endpoint: str = "http://localhost:8000/who"  # Endpoint for /who requests
 
@@ -346,7 +350,10 @@ class AppConfig:
                 db_type=self._get_config_value(cfg.get("db_type")),  # Add db_type
                 enabled=cfg.get("enabled", False),  # Add enabled field
                 use_knn=cfg.get("use_knn"),
-                vector_type=cfg.get("vector_type")
+                vector_type=cfg.get("vector_type"),
+                cache_enabled=cfg.get("cache_enabled", True),
+                cache_ttl=cfg.get("cache_ttl", 300),
+                cache_max_size=cfg.get("cache_max_size", 1024)
             )
     
     def load_webserver_config(self, path: str = "config_webserver.yaml"):
@@ -487,6 +494,9 @@ class AppConfig:
         
         # Load who_endpoint from config
         who_endpoint = self._get_config_value(data.get("who_endpoint"), "http://localhost:8000/who")
+
+        # Load summary cache enabled flag
+        summary_cache_enabled = self._get_config_value(data.get("summary_cache_enabled"), False)
         
         # Load headers from config
         headers = data.get("headers", {})
@@ -524,6 +534,7 @@ class AppConfig:
             required_info_enabled=required_info_enabled,
             aggregation_enabled=aggregation_enabled,
             who_endpoint_enabled=who_endpoint_enabled,
+            summary_cache_enabled=summary_cache_enabled,
             api_keys=api_keys,
             who_endpoint=who_endpoint
         )
@@ -1,102 +1,229 @@
 from core.state import NLWebHandlerState
 import asyncio
+import logging
+import math
+import time
+from core.config import CONFIG
+from core.embedding import get_embedding
 from core.prompts import PromptRunner
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("post_ranking")
 
+# Specialized address extractors for sites whose schema_object layout is
+# known and fixed. Maps site id -> function taking the schema_object dict and
+# returning the display address string (or None). Deployments against a single
+# source can register a tight extractor here to skip the generic probing, e.g.
+#   _SITE_ADDRESS_EXTRACTORS['yelp'] = lambda schema_obj: schema_obj.get('address')
+_SITE_ADDRESS_EXTRACTORS = {}
+
+# Possible address field names in schema_object, in order of likelihood
+_ADDR_KEYS = ('address', 'location', 'streetAddress', 'postalAddress')
+# Fields of a structured (dict) address, in display order
+_STRUCT_ADDR_FIELDS = ('streetAddress', 'addressLocality', 'addressRegion', 'postalCode')
+
+
+def _extract_address(schema_obj, hint_key=None):
+    """
+    Extract an address from a schema_object dict.
+
+    Results in a set usually share the same field layout, so callers can pass
+    the key that hit on the previous result as hint_key to skip the probe loop.
+
+    Returns:
+        Tuple of (address or None, key that matched or None)
+    """
+    address = None
+    hit_key = None
+
+    # Try the hinted key first - same source means same field layout
+    if hint_key is not None:
+        value = schema_obj.get(hint_key)
+        if value:
+            address = value
+            hit_key = hint_key
+
+    if address is None:
+        for key in _ADDR_KEYS:
+            value = schema_obj.get(key)
+            if value:
+                address = value
+                hit_key = key
+                break
+
+    if address is None:
+        return None, None
+
+    # Fast path: in typical schema.org payloads the address is a plain string
+    if isinstance(address, str):
+        # Extract just the address part before any dictionary representation,
+        # with a single scan and no intermediate list from split
+        idx = address.find("{")
+        if idx != -1:
+            address = address[:idx].rstrip(", ")
+
+    # If address is a dict, try to get a string representation
+    elif isinstance(address, dict):
+        address = _address_from_dict(address)
+
+    return address, hit_key
+
+
+def _address_from_dict(address):
+    """Build a display string from a structured address dict, or None."""
+    address_parts = []
+    for field in _STRUCT_ADDR_FIELDS:
+        if field in address:
+            value = address[field]
+            # Skip if it's a dict or complex object
+            if not isinstance(value, dict):
+                address_parts.append(str(value))
+
+    # Handle country separately - extract just the name if it's a dict
+    country = address.get('addressCountry')
+    if country is not None:
+        if isinstance(country, dict) and 'name' in country:
+            address_parts.append(country['name'])
+        elif isinstance(country, str) and not country.startswith('{'):
+            address_parts.append(country)
+
+    if address_parts:
+        return ', '.join(address_parts)
+    # If we couldn't extract parts, skip this address
+    return None
+
+
+def _addr_entries(results, site_extractor, max_misses):
+    """
+    Yield a map-location entry for each result that has an address.
+
+    Stops early once more than max_misses results lack one, since the caller's
+    at-least-half threshold can no longer be reached at that point.
+    """
+    addr_key_hint = None
+    misses = 0
+
+    # Pre-bind names resolved on every iteration of the hot loop
+    _isinstance = isinstance
+    _dict = dict
+    extract_address = _extract_address
+
+    for result in results:
+        # Check for address field in the result's schema_object
+        address = None
+        if 'schema_object' in result:
+            schema_obj = result['schema_object']
+            if _isinstance(schema_obj, _dict):
+                if site_extractor is not None:
+                    address = site_extractor(schema_obj)
+                else:
+                    address, addr_key_hint = extract_address(schema_obj, addr_key_hint)
+
+        if address:
+            yield {
+                'title': result.get('name', 'Unnamed'),
+                'address': str(address)
+            }
+        else:
+            misses += 1
+            if misses > max_misses:
+                return
+
+
+def _send_in_background(handler, message, description):
+    """
+    Send a message without awaiting it on the current path.
+
+    Keeps a strong reference to the task on the handler so it is not
+    garbage-collected mid-flight, and logs the actual outcome from a done
+    callback instead of swallowing exceptions.
+    """
+    bg_tasks = getattr(handler, '_bg_tasks', None)
+    if bg_tasks is None:
+        bg_tasks = handler._bg_tasks = set()
+
+    task = asyncio.create_task(handler.send_message(message))
+    bg_tasks.add(task)
+
+    def _on_done(t):
+        bg_tasks.discard(t)
+        if t.cancelled():
+            logger.warning("%s send was cancelled", description)
+        elif t.exception() is not None:
+            logger.error("%s send failed", description, exc_info=t.exception())
+        else:
+            logger.debug("%s send completed", description)
+
+    task.add_done_callback(_on_done)
+
 
 class PostRanking:
     """This class is used to check if any post processing is needed after the ranking is done."""
     
     def __init__(self, handler):
         self.handler = handler
+        # Resolve the address extractor once: a handler bound to a single site
+        # with a registered layout can skip the generic candidate probing
+        site = getattr(handler, 'site', None)
+        if isinstance(site, str):
+            self._site_address_extractor = _SITE_ADDRESS_EXTRACTORS.get(site)
+        else:
+            self._site_address_extractor = None
 
     async def do(self):
         if not self.handler.connection_alive_event.is_set():
             self.handler.query_done = True
             return
-        
+
+        if (self.handler.generate_mode == "summarize"):
+            # The map check (pure Python, ms) and the summarize LLM call
+            # (seconds) are independent, so overlap them: post-ranking then
+            # takes max of the two instead of their sum
+            await asyncio.gather(
+                self.check_and_send_map_message(),
+                SummarizeResults(self.handler).do()
+            )
+            return
+
         # Check if we should send a map message for results with addresses
         await self.check_and_send_map_message()
-        
+
         if (self.handler.generate_mode == "none"):
             # nothing to do
             return
-        
-        if (self.handler.generate_mode == "summarize"):
-            await SummarizeResults(self.handler).do()
-            return
     
     async def check_and_send_map_message(self):
         """Check if at least half of the results have addresses and send a map message if so."""
         try:
+            # Skip entirely if map messages are disabled for this handler
+            if not getattr(self.handler, 'enable_map_message', True):
+                logger.debug("Map messages disabled - skipping address check")
+                return
+
             # Get the final ranked answers
             results = getattr(self.handler, 'final_ranked_answers', [])
             if not results:
                 logger.debug("No results to check for addresses")
                 return
-            
-            # Count results with addresses and collect map data
-            results_with_addresses = []
-            
-            for result in results:
-                # Check if result has schema_object field
-                if 'schema_object' not in result:
-                    continue
-                
-                schema_obj = result['schema_object']
-                
-                # Check for address field in schema_object
-                address = None
-                if isinstance(schema_obj, dict):
-                    # Check for different possible address field names
-                    address = (schema_obj.get('address') or 
-                              schema_obj.get('location') or 
-                              schema_obj.get('streetAddress') or
-                              schema_obj.get('postalAddress'))
-                    
-                    # If address is a string, check if it looks like it has a dict representation at the end
-                    if isinstance(address, str) and "{" in address:
-                        # Extract just the address part before any dictionary representation
-                        address = address.split(", {")[0]
-                    
-                    # If address is a dict, try to get a string representation
-                    elif isinstance(address, dict):
-                        # Handle structured address
-                        address_parts = []
-                        for field in ['streetAddress', 'addressLocality', 'addressRegion', 'postalCode']:
-                            if field in address:
-                                value = address[field]
-                                # Skip if it's a dict or complex object
-                                if not isinstance(value, dict):
-                                    address_parts.append(str(value))
-                        
-                        # Handle country separately - extract just the name if it's a dict
-                        if 'addressCountry' in address:
-                            country = address['addressCountry']
-                            if isinstance(country, dict) and 'name' in country:
-                                address_parts.append(country['name'])
-                            elif isinstance(country, str) and not country.startswith('{'):
-                                address_parts.append(country)
-                        
-                        if address_parts:
-                            address = ', '.join(address_parts)
-                        else:
-                            # If we couldn't extract parts, skip this address
-                            address = None
-                
-                if address:
-                    results_with_addresses.append({
-                        'title': result.get('name', 'Unnamed'),
-                        'address': str(address)
-                    })
-            
-            # Check if at least half have addresses
+
+            # Snapshot the list - SummarizeResults may run concurrently and
+            # truncates handler.final_ranked_answers in place
+            results = list(results)
+
+            # Sending requires at least half the results to have addresses, so
+            # the extraction stops once the threshold is unreachable
             total_results = len(results)
+            threshold = (total_results + 1) // 2
+            max_misses = total_results - threshold
+
+            # Collect map data in a single list() pass over the generator
+            results_with_addresses = list(
+                _addr_entries(results, self._site_address_extractor, max_misses))
+
+            # Check if at least half have addresses
             results_with_addr_count = len(results_with_addresses)
             
-            logger.info(f"Found {results_with_addr_count} results with addresses out of {total_results} total results")
+            logger.info("Found %d results with addresses out of %d total results", results_with_addr_count, total_results)
             
             if results_with_addr_count >= total_results / 2 and results_with_addr_count > 0:
                 # Send the map message
@@ -106,24 +233,72 @@ class PostRanking:
                     'locations': results_with_addresses
                 }
                 
-                logger.info(f"Sending results_map message with {results_with_addr_count} locations")
-                logger.info(f"Map message content: {map_message}")
+                logger.info("Sending results_map message with %d locations", results_with_addr_count)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Map message content: %s", map_message)
                 
-                try:
-                    asyncio.create_task(self.handler.send_message(map_message))
-                    logger.info("results_map message sent successfully")
-                except Exception as e:
-                    logger.error(f"Failed to send results_map message: {str(e)}", exc_info=True)
+                _send_in_background(self.handler, map_message, "results_map")
             else:
-                logger.debug(f"Not sending map message - only {results_with_addr_count}/{total_results} results have addresses")
+                logger.debug("Not sending map message - only %d/%d results have addresses", results_with_addr_count, total_results)
                 
         except Exception as e:
-            logger.error(f"Error checking/sending map message: {str(e)}")
+            logger.error("Error checking/sending map message: %s", str(e))
             # Don't fail the whole post-ranking process if map generation fails
             pass
         
        
         
+# Semantic cache for summaries. Entries are keyed by the URLs of the top
+# results; a probe hits when the URLs match and the query embeddings are
+# close enough in cosine similarity. Enabled via summary_cache_enabled.
+_SUMMARY_CACHE_TTL = 3600
+_SUMMARY_CACHE_MAX_KEYS = 256
+_SUMMARY_CACHE_SIMILARITY = 0.92
+_summary_cache = {}
+
+
+def _cosine_similarity(a, b):
+    """Cosine similarity between two embedding vectors."""
+    if len(a) != len(b):
+        return 0.0
+    dot = 0.0
+    norm_a = 0.0
+    norm_b = 0.0
+    for x, y in zip(a, b):
+        dot += x * y
+        norm_a += x * x
+        norm_b += y * y
+    if norm_a == 0.0 or norm_b == 0.0:
+        return 0.0
+    return dot / (math.sqrt(norm_a) * math.sqrt(norm_b))
+
+
+def _probe_summary_cache(urls_key, query_embedding):
+    """Return a cached summary for this result set and query, or None."""
+    entries = _summary_cache.get(urls_key)
+    if not entries:
+        return None
+    now = time.time()
+    live = [entry for entry in entries if entry[2] > now]
+    if not live:
+        del _summary_cache[urls_key]
+        return None
+    if len(live) != len(entries):
+        _summary_cache[urls_key] = live
+    for embedding, summary, _ in live:
+        if _cosine_similarity(query_embedding, embedding) >= _SUMMARY_CACHE_SIMILARITY:
+            return summary
+    return None
+
+
+def _store_summary_in_cache(urls_key, query_embedding, summary):
+    """Store a summary in the cache, evicting the oldest key if full."""
+    if urls_key not in _summary_cache and len(_summary_cache) >= _SUMMARY_CACHE_MAX_KEYS:
+        _summary_cache.pop(next(iter(_summary_cache)))
+    _summary_cache.setdefault(urls_key, []).append(
+        (query_embedding, summary, time.time() + _SUMMARY_CACHE_TTL))
+
+
 class SummarizeResults(PromptRunner):
 
     SUMMARIZE_RESULTS_PROMPT_NAME = "SummarizeResultsPrompt"
@@ -131,12 +306,46 @@ class SummarizeResults(PromptRunner):
     def __init__(self, handler):
         super().__init__(handler)
 
+    async def _get_query_embedding(self):
+        """Embed the query for cache lookup, matching the text used in the prompt."""
+        if self.handler.state.is_decontextualization_done():
+            query = self.handler.decontextualized_query
+        else:
+            query = self.handler.query
+        try:
+            return await get_embedding(query, query_params=self.handler.query_params)
+        except Exception as e:
+            logger.warning("Failed to get query embedding for summary cache: %s", str(e))
+            return None
+
     async def do(self):
-        self.handler.final_ranked_answers = self.handler.final_ranked_answers[:3]
+        # Truncate in place - the prompt fills request.answers from handler
+        # state, and del avoids copying the list and rebinding the attribute
+        # out from under anything still holding the original reference
+        del self.handler.final_ranked_answers[3:]
+
+        # Probe the semantic cache before paying for the LLM call
+        urls_key = None
+        query_embedding = None
+        if CONFIG.nlweb.summary_cache_enabled:
+            urls_key = tuple(r.get('url') for r in self.handler.final_ranked_answers)
+            query_embedding = await self._get_query_embedding()
+            if query_embedding:
+                cached_summary = _probe_summary_cache(urls_key, query_embedding)
+                if cached_summary is not None:
+                    logger.info("Summary cache hit - skipping summarize prompt")
+                    self.handler.summary = cached_summary
+                    message = {"message_type": "result", "@type": "Summary", "content": cached_summary}
+                    asyncio.create_task(self.handler.send_message(message))
+                    await self.handler.state.precheck_step_done("post_ranking")
+                    return
+
         response = await self.run_prompt(self.SUMMARIZE_RESULTS_PROMPT_NAME, timeout=20)
         if (not response):
             return
         self.handler.summary = response["summary"]
+        if query_embedding:
+            _store_summary_in_cache(urls_key, query_embedding, self.handler.summary)
         message = {"message_type": "result", "@type": "Summary", "content": self.handler.summary}
         asyncio.create_task(self.handler.send_message(message))
         # Use proper state update
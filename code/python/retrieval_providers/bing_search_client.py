@@ -6,11 +6,20 @@ Bing Web Search Client - Interface for Bing Web Search API operations.
 Provides read-only access to web search results with site-specific filtering.
 """
 
+import functools
 import json
 import httpx
 import asyncio
 import re
-from typing import List, Dict, Any, Optional, Union
+import time
+from collections import OrderedDict
+
+# orjson is a much faster JSON encoder/decoder; fall back to stdlib if missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from typing import List, Dict, Any, Optional, Tuple, Union
 from urllib.parse import urlparse, quote
 from core.config import CONFIG
 from core.retriever import RetrievalClientBase
@@ -18,6 +27,40 @@ from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("bing_search_client")
 
+# msgspec can decode just the fields we consume and skip the rest of the
+# payload (queries, context, spelling, ...); optional accelerator like orjson
+try:
+    import msgspec
+
+    class _BingWebPages(msgspec.Struct):
+        value: List[Dict[str, Any]] = []
+
+    class _BingSearchResponse(msgspec.Struct):
+        webPages: Optional[_BingWebPages] = None
+
+    _response_decoder = msgspec.json.Decoder(_BingSearchResponse)
+except ImportError:
+    _response_decoder = None
+
+
+# Built once at import - reusing one SSL context avoids re-parsing the
+# certificate store every time a client is constructed
+_SSL_CONTEXT = httpx.create_ssl_context()
+
+
+def _json_dumps(obj) -> str:
+    """Serialize a dict to a JSON string with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _parse_response_json(response) -> Dict[str, Any]:
+    """Parse an httpx response body with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
 
 class BingSearchClient(RetrievalClientBase):
     """
@@ -45,8 +88,67 @@ class BingSearchClient(RetrievalClientBase):
         self.api_endpoint = self.endpoint_config.api_endpoint
         if not self.api_endpoint:
             self.api_endpoint = "https://www.bingapis.com/api/v7/search"
-        
-        logger.info(f"Initialized BingSearchClient for endpoint: {self.endpoint_name}")
+
+        # Shared HTTP client, created lazily so connections are reused across searches
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_lock = asyncio.Lock()
+
+        # Bound concurrent API requests to respect quota
+        self._search_semaphore = asyncio.Semaphore(10)
+
+        # TTL + LRU cache of query results - the API is billed per query and
+        # workloads re-issue near-identical queries (retries, follow-ups)
+        self._cache_enabled = self.endpoint_config.cache_enabled
+        self._cache_ttl = self.endpoint_config.cache_ttl
+        self._cache_max_size = self.endpoint_config.cache_max_size
+        self._cache: OrderedDict = OrderedDict()  # key -> (expiry, results)
+
+        logger.info("Initialized BingSearchClient for endpoint: %s", self.endpoint_name)
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use."""
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    transport = httpx.AsyncHTTPTransport(
+                        retries=1,
+                        verify=_SSL_CONTEXT,
+                        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+                    )
+                    self._client = httpx.AsyncClient(
+                        transport=transport,
+                        timeout=httpx.Timeout(30.0, connect=3.0)
+                    )
+        return self._client
+
+    def _cache_get(self, key):
+        """Return cached results for key, or None if missing or expired."""
+        if not self._cache_enabled:
+            return None
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expiry, results = entry
+        if expiry <= time.time():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return list(results)
+
+    def _cache_put(self, key, results):
+        """Store results for key, evicting the least recently used entry if full."""
+        if not self._cache_enabled:
+            return
+        if key not in self._cache and len(self._cache) >= self._cache_max_size:
+            self._cache.popitem(last=False)
+        self._cache[key] = (time.time() + self._cache_ttl, results)
+        self._cache.move_to_end(key)
+
+    async def aclose(self):
+        """Close the shared HTTP client if it was created."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _get_endpoint_config(self):
         """Get the Bing Search endpoint configuration from CONFIG"""
@@ -92,15 +194,18 @@ class BingSearchClient(RetrievalClientBase):
         # Otherwise, Bing should not handle this query (it's a fallback)
         return False
 
-    def _extract_domain_from_url(self, url: str) -> str:
-        """Extract domain from URL for site identification."""
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _extract_domain_from_url(url: str) -> str:
+        """Extract domain from URL for site identification.
+
+        Memoized - the same hosts recur heavily across queries and urlparse
+        is comparatively expensive.
+        """
         try:
             parsed = urlparse(url)
-            domain = parsed.netloc
             # Remove www. prefix if present
-            if domain.startswith("www."):
-                domain = domain[4:]
-            return domain
+            return parsed.netloc.removeprefix("www.")
         except:
             return "unknown"
     
@@ -239,21 +344,22 @@ class BingSearchClient(RetrievalClientBase):
         Returns:
             List in NLWeb format: [url, json_str, name, site]
         """
+        # Probe each field once rather than re-fetching below
         url = bing_result.get("url", "")
         name = bing_result.get("name", "")
         snippet = bing_result.get("snippet", "")
-        
+        thumbnail_url = bing_result.get("thumbnailUrl")
+
         # Extract domain from URL if site not provided
         if not site or site == "all":
             site = self._extract_domain_from_url(url)
-        
+
         # Try to extract product information if enabled
         if extract_product_info:
             # Get grounding text if available (contains richer product data)
-            grounding_text = ""
-            if "grounding" in bing_result and isinstance(bing_result["grounding"], dict):
-                grounding_text = bing_result["grounding"].get("semanticDocument", "")
-            
+            grounding = bing_result.get("grounding")
+            grounding_text = grounding.get("semanticDocument", "") if isinstance(grounding, dict) else ""
+
             product_info = self._extract_product_info_from_snippet(name, snippet, grounding_text)
         else:
             product_info = {}
@@ -305,9 +411,9 @@ class BingSearchClient(RetrievalClientBase):
                 ]
             
             # Add image if available
-            if bing_result.get("thumbnailUrl"):
-                schema_obj["image"] = bing_result["thumbnailUrl"]
-            
+            if thumbnail_url:
+                schema_obj["image"] = thumbnail_url
+
         else:
             # Use WebPage schema (original behavior)
             schema_obj = {
@@ -316,7 +422,7 @@ class BingSearchClient(RetrievalClientBase):
                 "description": snippet,
                 "url": url,
                 "datePublished": bing_result.get("dateLastCrawled"),
-                "thumbnailUrl": bing_result.get("thumbnailUrl"),
+                "thumbnailUrl": thumbnail_url,
                 "isFamilyFriendly": bing_result.get("isFamilyFriendly", True)
             }
             
@@ -324,7 +430,7 @@ class BingSearchClient(RetrievalClientBase):
             if "displayUrl" in bing_result:
                 schema_obj["displayUrl"] = bing_result["displayUrl"]
         
-        json_str = json.dumps(schema_obj)
+        json_str = _json_dumps(schema_obj)
         
         return [url, json_str, name, site]
     
@@ -370,13 +476,13 @@ class BingSearchClient(RetrievalClientBase):
                     waited += wait_interval
                 
                 if waited >= max_wait:
-                    logger.warning(f"Timeout waiting for rewritten_queries after {max_wait}s")
+                    logger.warning("Timeout waiting for rewritten_queries after %ds", max_wait)
             
             rewritten_queries = getattr(handler, 'rewritten_queries', None) if handler else None
             
             # Use rewritten queries if available and multiple queries exist
             if rewritten_queries and len(rewritten_queries) > 1:
-                logger.info(f"Using {len(rewritten_queries)} rewritten queries for Bing search: {rewritten_queries}")
+                logger.info("Using %d rewritten queries for Bing search: %s", len(rewritten_queries), rewritten_queries)
                 
                 # Calculate results per query to maintain total count
                 results_per_query = max(1, num_results // len(rewritten_queries))
@@ -415,7 +521,7 @@ class BingSearchClient(RetrievalClientBase):
                 
                 for result in all_results:
                     if isinstance(result, Exception):
-                        logger.warning(f"Search failed for a rewritten query: {result}")
+                        logger.warning("Search failed for a rewritten query: %s", result)
                     elif result:
                         for item in result:
                             url = item[0] if item else None
@@ -429,15 +535,23 @@ class BingSearchClient(RetrievalClientBase):
             # No rewritten queries - use original query
             # Handle multiple sites
             if isinstance(site, list):
-                # For multiple sites, perform separate searches and combine results
-                all_results = []
+                # For multiple sites, perform the searches concurrently and combine results
                 results_per_site = max(10, num_results // len(site))
-                
-                for single_site in site:
-                    site_results = await self._search_single_site(query, single_site, results_per_site,
-                                                                 extract_product_info=extract_product_info)
-                    all_results.extend(site_results)
-                
+
+                site_results_list = await asyncio.gather(
+                    *[self._search_single_site(query, single_site, results_per_site,
+                                               extract_product_info=extract_product_info)
+                      for single_site in site],
+                    return_exceptions=True
+                )
+
+                all_results = []
+                for site_results in site_results_list:
+                    if isinstance(site_results, Exception):
+                        logger.warning("Search failed for a site: %s", site_results)
+                    elif site_results:
+                        all_results.extend(site_results)
+
                 # Limit to requested number of results
                 return all_results[:num_results]
             else:
@@ -445,7 +559,7 @@ class BingSearchClient(RetrievalClientBase):
                                                      extract_product_info=extract_product_info)
                 
         except Exception as e:
-            logger.error(f"Error in Bing search: {e}")
+            logger.error("Error in Bing search: %s", e)
             return []
     
     async def _search_single_site(self, query: str, site: str, num_results: int,
@@ -468,7 +582,14 @@ class BingSearchClient(RetrievalClientBase):
             search_query = f"{query} site:{site}"
         else:
             search_query = query
-        
+
+        # Serve repeated queries from the cache without touching the API
+        cache_key = (search_query, num_results, extract_product_info)
+        cached_results = self._cache_get(cache_key)
+        if cached_results is not None:
+            logger.debug("Bing cache hit for: %s", search_query)
+            return cached_results
+
         # Prepare request parameters
         params = {
             "q": search_query,
@@ -477,37 +598,66 @@ class BingSearchClient(RetrievalClientBase):
         }
         
         try:
-            logger.info(f"Searching Bing for: {search_query} (limit: {num_results})")
-
-            # Make request to Bing API
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.api_endpoint, params=params, timeout=30.0)
-                response.raise_for_status()
+            logger.debug("Searching Bing for: %s (limit: %d)", search_query, num_results)
 
-                data = response.json()
+            # Make request to Bing API using the shared client so connections are reused
+            client = await self._get_client()
+            response = await client.get(self.api_endpoint, params=params, timeout=30.0)
+            response.raise_for_status()
 
-                # Extract web pages from response
+            # Extract web pages from the response, decoding only the fields
+            # we consume when msgspec is available
+            if _response_decoder is not None:
+                decoded = _response_decoder.decode(response.content)
+                results = decoded.webPages.value if decoded.webPages is not None else []
+            else:
+                data = _parse_response_json(response)
                 web_pages = data.get("webPages", {})
                 results = web_pages.get("value", [])
 
-                logger.info(f"Bing returned {len(results)} results")
+            logger.debug("Bing returned %d results", len(results))
+
+            # Convert to NLWeb format
+            nlweb_results = []
+            for result in results[:num_results]:
+                nlweb_result = self._convert_bing_result_to_nlweb_format(result, site,
+                                                                        extract_product_info=extract_product_info)
+                nlweb_results.append(nlweb_result)
+
+            self._cache_put(cache_key, nlweb_results)
+            return nlweb_results
+
 
-                # Convert to NLWeb format
-                nlweb_results = []
-                for result in results[:num_results]:
-                    nlweb_result = self._convert_bing_result_to_nlweb_format(result, site,
-                                                                            extract_product_info=extract_product_info)
-                    nlweb_results.append(nlweb_result)
-                
-                return nlweb_results
-                
         except httpx.HTTPError as e:
-            logger.error(f"HTTP error during Bing search: {e}")
+            logger.error("HTTP error during Bing search: %s", e)
             return []
         except Exception as e:
-            logger.error(f"Unexpected error during Bing search: {e}")
+            logger.error("Unexpected error during Bing search: %s", e)
             return []
     
+    async def search_many(self, queries: List[Tuple[str, str]], num_results: int = 10,
+                          **kwargs) -> List[Any]:
+        """
+        Execute multiple searches concurrently.
+
+        Args:
+            queries: List of (query, site) pairs to search
+            num_results: Maximum number of results per query
+            **kwargs: Additional parameters passed to each search
+
+        Returns:
+            List with one entry per query, in order: either a result list
+            or the exception raised by that search
+        """
+        async def bounded_search(query: str, site: str):
+            async with self._search_semaphore:
+                return await self.search(query, site, num_results, **kwargs)
+
+        return await asyncio.gather(
+            *[bounded_search(query, site) for query, site in queries],
+            return_exceptions=True
+        )
+
     async def search_all_sites(self, query: str, num_results: int = 50, **kwargs) -> List[List[str]]:
         """
         Search across all sites (no site filter).